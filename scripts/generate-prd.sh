@@ -19,6 +19,33 @@ readonly MAX_INPUT_LENGTH=10240  # 10KB
 readonly ALLOWED_CHARS_PATTERN='^[a-zA-Z0-9[:space:]\-_.,!?()[\]{}'"'"'":;@#%&*+=/<>|~`^\\]*$'
 readonly BLOCKED_PATTERNS=('{{' '${' '<script' 'javascript:' 'eval(' 'function(' 'require(' 'import(' '../' '/./')
 
+# Union of the blocked patterns as one escaped regex, so clean input is
+# checked in a single pass
+literal_regex_union() {
+    local target="$1"
+    shift
+    local union="" literal char i
+
+    for literal in "$@"; do
+        union+="${union:+|}"
+        for ((i = 0; i < ${#literal}; i++)); do
+            char="${literal:i:1}"
+            if [[ "$char" == [][\\.^\$*+?\(\)\{\}\|] ]]; then
+                union+="\\"
+            fi
+            union+="$char"
+        done
+    done
+    printf -v "$target" '%s' "$union"
+}
+literal_regex_union BLOCKED_PATTERN_UNION "${BLOCKED_PATTERNS[@]}"
+readonly BLOCKED_PATTERN_UNION
+
+# Keywords flagged as potentially sensitive in generated documents, with
+# their grep arguments for a single fixed-string pass
+readonly SENSITIVE_PATTERNS=("password" "secret" "key" "token" "api_key")
+readonly SENSITIVE_GREP_ARGS=("${SENSITIVE_PATTERNS[@]/#/-e}")
+
 # Colors for output
 readonly RED='\033[0;31m'
 readonly GREEN='\033[0;32m'
@@ -30,6 +57,7 @@ readonly NC='\033[0m' # No Color
 declare -g CURRENT_PHASE=""
 declare -g PHASE_DATA=""
 declare -g SECURITY_VALIDATED=false
+declare -g -a GENERATED_FILES=()
 
 # Logging function
 log() {
@@ -54,13 +82,15 @@ validate_input() {
         return 1
     fi
 
-    # Check for blocked patterns
-    for pattern in "${BLOCKED_PATTERNS[@]}"; do
-        if [[ "$input" == *"$pattern"* ]]; then
-            log "ERROR" "Input contains blocked pattern: $pattern"
-            return 1
-        fi
-    done
+    # Check for blocked patterns, naming the first one only if the union hits
+    if [[ "$input" =~ $BLOCKED_PATTERN_UNION ]]; then
+        for pattern in "${BLOCKED_PATTERNS[@]}"; do
+            if [[ "$input" == *"$pattern"* ]]; then
+                log "ERROR" "Input contains blocked pattern: $pattern"
+                return 1
+            fi
+        done
+    fi
 
     # Check for dangerous control characters
     if [[ "$input" =~ [[:cntrl:]] ]]; then
@@ -77,7 +107,7 @@ validate_input() {
 # Path sanitization function
 sanitize_path() {
     local input_path="$1"
-    local base_dir="$2"
+    local base_prefix="${2%/}/"
 
     # Convert to absolute path and normalize
     local canonical_path
@@ -86,8 +116,9 @@ sanitize_path() {
         return 1
     }
 
-    # Ensure path is within base directory
-    if [[ "$canonical_path" != "$base_dir"* ]]; then
+    # Ensure path is within base directory; the trailing slash keeps
+    # sibling directories sharing the name as a prefix out
+    if [[ "$canonical_path" != "$base_prefix"* ]]; then
         log "ERROR" "Path traversal attempt detected: $input_path"
         return 1
     fi
@@ -99,11 +130,9 @@ sanitize_path() {
 initialize_environment() {
     log "INFO" "Initializing secure environment"
 
-    # Create secure directories
-    mkdir -p "$SECURE_OUTPUT_DIR"/{architecture/{adr,c4-diagrams,domain-models},implementation/{pseudocode,test-scenarios},.ai-context}
-    mkdir -p "$PROJECT_DIR/logs"
-    mkdir -p "$PROJECT_DIR/config"
-    mkdir -p "$PROJECT_DIR/temp"
+    # Create secure directories in a single mkdir call
+    mkdir -p "$SECURE_OUTPUT_DIR"/{architecture/{adr,c4-diagrams,domain-models},implementation/{pseudocode,test-scenarios},.ai-context} \
+        "$PROJECT_DIR"/{logs,config,temp}
 
     # Set secure permissions
     chmod 755 "$SECURE_OUTPUT_DIR"
@@ -155,14 +184,9 @@ create_checkpoint() {
 
     log "INFO" "Creating checkpoint for phase: $phase"
 
-    cat > "$checkpoint_file" << EOF
-{
-  "phase": "$phase",
-  "timestamp": "$(date -Iseconds)",
-  "status": "completed",
-  "data": $(echo "$data" | jq -Rs .)
-}
-EOF
+    # Build and write the whole document in a single jq call
+    jq -n --arg phase "$phase" --arg timestamp "$(date -Iseconds)" --arg data "$data" \
+        '{phase: $phase, timestamp: $timestamp, status: "completed", data: $data}' > "$checkpoint_file"
 
     chmod 600 "$checkpoint_file"
 }
@@ -250,15 +274,9 @@ phase_problem_analysis() {
 
     # Create structured data
     local analysis_data
-    analysis_data=$(cat << EOF
-{
-  "user_input": $(echo "$user_input" | jq -Rs .),
-  "requirements": $(echo "$requirements" | jq -Rs .),
-  "timestamp": "$(date -Iseconds)",
-  "security_validated": true
-}
-EOF
-)
+    analysis_data=$(jq -n --arg user_input "$user_input" --arg requirements "$requirements" \
+        --arg timestamp "$(date -Iseconds)" \
+        '{user_input: $user_input, requirements: $requirements, timestamp: $timestamp, security_validated: true}')
 
     create_checkpoint "$CURRENT_PHASE" "$analysis_data"
     PHASE_DATA="$analysis_data"
@@ -286,7 +304,7 @@ phase_ddd_strategic() {
 
     # Extract user input from previous phase
     local user_input
-    user_input=$(echo "$PHASE_DATA" | jq -r '.user_input // empty')
+    user_input=$(jq -r '.user_input // empty' <<< "$PHASE_DATA")
 
     if [[ -z "$user_input" ]]; then
         log "ERROR" "No user input available from previous phase"
@@ -519,6 +537,7 @@ EOF
 
     # Set secure permissions
     chmod 644 "$safe_path"
+    GENERATED_FILES+=("$safe_path")
 
     log "INFO" "PRD document generated successfully at: $safe_path"
     return 0
@@ -614,6 +633,7 @@ EOF
 EOF
 
     chmod 644 "$safe_adr_path" "$safe_domain_path" "$safe_context_path"
+    GENERATED_FILES+=("$safe_adr_path" "$safe_domain_path" "$safe_context_path")
 
     log "INFO" "Supporting documentation generated successfully"
     return 0
@@ -625,28 +645,47 @@ perform_security_scan() {
 
     local scan_results="$PROJECT_DIR/logs/security-scan-$(date +%Y%m%d_%H%M%S).log"
 
-    # Check for sensitive information in generated files
-    local sensitive_patterns=("password" "secret" "key" "token" "api_key")
     local issues_found=false
 
-    while IFS= read -r -d '' file; do
-        for pattern in "${sensitive_patterns[@]}"; do
-            if grep -iq "$pattern" "$file"; then
-                echo "WARNING: Potential sensitive information found in $file: $pattern" | tee -a "$scan_results"
-                issues_found=true
+    # Check the files recorded as written by this run, or walk the whole
+    # output tree when none were recorded. Both list each file's
+    # permissions alongside its path
+    local -a listing=(find "$SECURE_OUTPUT_DIR" -type f -printf '%m\t%p\0')
+    if [[ ${#GENERATED_FILES[@]} -gt 0 ]]; then
+        listing=(stat --printf '%a\t%n\0' -- "${GENERATED_FILES[@]}")
+        log "INFO" "Validating only the ${#GENERATED_FILES[@]} files written by this run"
+    fi
+
+    # Split each record at its first tab only; read would strip a tab
+    # that ends the file name
+    local record perms file
+    while IFS= read -r -d '' record; do
+        perms="${record%%$'\t'*}"
+        file="${record#*$'\t'}"
+
+        if [[ "$file" == *.md ]]; then
+            # Check for sensitive information; one fixed-string pass
+            # collects every line holding any keyword. The keywords are
+            # ASCII, so the C locale matches bytes without decoding
+            local hits
+            if hits=$(LC_ALL=C grep -iF "${SENSITIVE_GREP_ARGS[@]}" "$file"); then
+                hits="${hits,,}"
+
+                for pattern in "${SENSITIVE_PATTERNS[@]}"; do
+                    if [[ "$hits" == *"$pattern"* ]]; then
+                        echo "WARNING: Potential sensitive information found in $file: $pattern" | tee -a "$scan_results"
+                        issues_found=true
+                    fi
+                done
             fi
-        done
-    done < <(find "$SECURE_OUTPUT_DIR" -name "*.md" -print0)
+        fi
 
-    # Validate file permissions
-    while IFS= read -r -d '' file; do
-        local perms
-        perms=$(stat -c "%a" "$file")
+        # Validate file permissions
         if [[ "$perms" -gt 644 ]]; then
             echo "WARNING: Overly permissive file permissions on $file: $perms" | tee -a "$scan_results"
             issues_found=true
         fi
-    done < <(find "$SECURE_OUTPUT_DIR" -type f -print0)
+    done < <("${listing[@]}")
 
     if [[ "$issues_found" == "true" ]]; then
         log "WARN" "Security issues found. See $scan_results for details"
@@ -733,7 +772,11 @@ main() {
     echo -e "Log file: $LOG_FILE"
     echo
     echo -e "Generated files:"
-    find "$SECURE_OUTPUT_DIR" -name "*.md" -exec echo "  - {}" \;
+    if [[ ${#GENERATED_FILES[@]} -gt 0 ]]; then
+        printf '  - %s\n' "${GENERATED_FILES[@]}"
+    else
+        find "$SECURE_OUTPUT_DIR" -name "*.md" -printf '  - %p\n'
+    fi
     echo
 
     # Cleanup
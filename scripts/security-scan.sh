@@ -3,6 +3,15 @@
 # Comprehensive Security Scanner
 # Security validation for generated PRD content and files
 # Version: 1.0.0
+#
+# Usage: security-scan.sh [scan_dir]
+# Environment:
+#   SCAN_JOBS          Files matched concurrently (default: CPU count)
+#   SCAN_CACHE_DIR     Directory that caches matches of unchanged files
+#                      across runs; it must be owned by you and not
+#                      group or world writable (default: unset, no cache)
+#   SCAN_SUMMARY_ONLY  "true" prints only the summary, not each finding
+#                      (default: false)
 
 set -euo pipefail
 
@@ -10,6 +19,14 @@ readonly SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 readonly PROJECT_DIR="$(dirname "$SCRIPT_DIR")"
 readonly SCAN_DIR="${1:-$PROJECT_DIR/generated}"
 readonly SCAN_REPORT="$PROJECT_DIR/logs/security-scan-$(date +%Y%m%d_%H%M%S).json"
+SCAN_JOBS="${SCAN_JOBS:-$(nproc 2>/dev/null || echo 1)}"
+if [[ ! "$SCAN_JOBS" =~ ^[1-9][0-9]*$ ]]; then
+    SCAN_JOBS=1
+fi
+readonly SCAN_JOBS
+readonly SCAN_CACHE_DIR="${SCAN_CACHE_DIR:-}"  # Opt-in match cache across runs
+readonly SCAN_CACHE_VERSION=4  # Bump whenever match_file's output changes
+readonly SCAN_SUMMARY_ONLY="${SCAN_SUMMARY_ONLY:-false}"  # Count findings without details
 
 # Colors
 readonly RED='\033[0;31m'
@@ -36,6 +53,35 @@ declare -A RISK_LEVELS=(
     ["personal_data"]="HIGH"
 )
 
+# Result counter and display color for each risk level
+declare -A LEVEL_COUNTERS=(
+    ["CRITICAL"]="critical_issues"
+    ["HIGH"]="high_issues"
+    ["MEDIUM"]="medium_issues"
+    ["LOW"]="low_issues"
+)
+
+declare -A LEVEL_COLORS=(
+    ["CRITICAL"]="$RED"
+    ["HIGH"]="$RED"
+    ["MEDIUM"]="$YELLOW"
+    ["LOW"]="$YELLOW"
+)
+
+# Union of all security patterns, built once so each line is matched in a
+# single pass; the category is only resolved for lines that hit
+SECURITY_PATTERN_UNION=""
+for pattern_type in "${!SECURITY_PATTERNS[@]}"; do
+    SECURITY_PATTERN_UNION+="${SECURITY_PATTERN_UNION:+|}${SECURITY_PATTERNS[$pattern_type]}"
+done
+unset pattern_type
+readonly SECURITY_PATTERN_UNION
+
+# Potentially sensitive file names, with their union for a one-pass check
+readonly SUSPICIOUS_NAMES=("passwd" "shadow" "hosts" "config" "secrets" "private")
+SUSPICIOUS_NAME_UNION="${SUSPICIOUS_NAMES[*]}"
+readonly SUSPICIOUS_NAME_UNION="${SUSPICIOUS_NAME_UNION// /|}"
+
 # Initialize scan results
 declare -A SCAN_RESULTS=(
     ["files_scanned"]=0
@@ -54,68 +100,157 @@ log_result() {
     local pattern_type="$4"
     local content="$5"
 
-    case "$level" in
-        "CRITICAL")
-            ((SCAN_RESULTS["critical_issues"]++))
-            echo -e "${RED}[CRITICAL]${NC} $file:$line_num - $pattern_type"
-            ;;
-        "HIGH")
-            ((SCAN_RESULTS["high_issues"]++))
-            echo -e "${RED}[HIGH]${NC} $file:$line_num - $pattern_type"
-            ;;
-        "MEDIUM")
-            ((SCAN_RESULTS["medium_issues"]++))
-            echo -e "${YELLOW}[MEDIUM]${NC} $file:$line_num - $pattern_type"
-            ;;
-        "LOW")
-            ((SCAN_RESULTS["low_issues"]++))
-            echo -e "${YELLOW}[LOW]${NC} $file:$line_num - $pattern_type"
-            ;;
-    esac
+    ((SCAN_RESULTS["${LEVEL_COUNTERS[$level]}"]+=1))
+    ((SCAN_RESULTS["total_issues"]+=1))
 
+    if [[ "$SCAN_SUMMARY_ONLY" == "true" ]]; then
+        return 0
+    fi
+
+    echo -e "${LEVEL_COLORS[$level]}[$level]${NC} $file:$line_num - $pattern_type"
     echo "  Content: ${content:0:100}..."
-    ((SCAN_RESULTS["total_issues"]++))
+}
+
+# Probe the head of a file for binary content without reading all of it
+is_text_file() {
+    local LC_ALL=C
+    local head=""
+
+    # read stops early at a NUL byte within the first 8 KiB
+    if IFS= read -r -d '' -n 8192 head < "$1"; then
+        [[ ${#head} -eq 8192 ]]
+    fi
+}
+
+# Copy a file into the match cache under a temporary name and move it
+# into place, so no reader ever sees a partial entry
+cache_store() {
+    local tmp
+    tmp=$(mktemp "$2.XXXXXX") || return 1
+
+    if cp "$1" "$tmp" && mv -f "$tmp" "$2"; then
+        return 0
+    fi
+    rm -f "$tmp"
+    return 1
+}
+
+# Collect pattern matches for one file (runs as a background job). It
+# leaves either the matches, a .skip marker for non-text files or an
+# .error marker when the file could not be read
+match_file() {
+    local file="$1"
+    local output="$2"
+    local entry=""
+
+    # Reuse the matches of an unchanged file; the cache key covers the
+    # scanner version, the locale grep and sed match in, the pattern set,
+    # the path and the file's size and mtime
+    if [[ -n "$SCAN_CACHE_DIR" ]]; then
+        # Entries hold the matched lines themselves; keep them private
+        umask 077
+
+        local stamp hash
+        stamp=$(stat -c "%s:%.9Y" "$file")
+        read -r hash _ < <(printf '%s\0' "$SCAN_CACHE_VERSION" "${LC_ALL:-}" "${LC_CTYPE:-}" "${LANG:-}" \
+            "$SECURITY_PATTERN_UNION" "$file" "$stamp" | sha256sum)
+        entry="$SCAN_CACHE_DIR/$hash"
+
+        if [[ -f "$entry" && -f "$entry.lines" ]]; then
+            cp "$entry" "$output"
+            cp "$entry.lines" "$output.lines"
+            return 0
+        elif [[ -f "$entry.skip" ]]; then
+            : > "$output.skip"
+            return 0
+        fi
+    fi
+
+    if [[ ! -r "$file" ]]; then
+        : > "$output.error"
+        return 0
+    fi
+
+    # Only scan text files; known text suffixes skip the binary probe
+    if [[ "$file" == *.@(md|txt|json|sql) ]] || is_text_file "$file"; then
+        # Let grep stream the whole file once for the pattern union; only
+        # the candidate lines are kept. It runs in the caller's locale so
+        # the "." separators also match multibyte characters
+        local status=0
+        grep -aniE -- "$SECURITY_PATTERN_UNION" "$file" > "$output" || status=$?
+        if ((status > 1)); then
+            : > "$output.error"
+            return 0
+        fi
+
+        # Two more passes flag overly long lines and non-printable
+        # characters, printing each hit as a line number and check name.
+        # Lengths are counted in bytes, as "." skips invalid bytes in a
+        # UTF-8 locale; that can only over-report
+        LC_ALL=C sed -n '/.\{1001\}/{=;z;s/^/long_line/p}' "$file" > "$output.lines" &&
+            sed -n '/[^[:print:][:space:]]/{=;z;s/^/binary_content/p}' "$file" >> "$output.lines" || {
+            : > "$output.error"
+            return 0
+        }
+
+        # The main entry goes in last and marks a complete write
+        if [[ -n "$entry" ]]; then
+            cache_store "$output.lines" "$entry.lines" &&
+                cache_store "$output" "$entry" || true
+        fi
+    else
+        : > "$output.skip"
+        if [[ -n "$entry" ]]; then
+            : > "$entry.skip"
+        fi
+    fi
 }
 
 # Scan individual file
 scan_file() {
     local file="$1"
-    local line_num=0
+    local matches="$2"
+    local line_num
 
-    echo -e "${BLUE}Scanning: $file${NC}"
-    ((SCAN_RESULTS["files_scanned"]++))
+    if [[ "$SCAN_SUMMARY_ONLY" != "true" ]]; then
+        echo -e "${BLUE}Scanning: $file${NC}"
+    fi
+    ((SCAN_RESULTS["files_scanned"]+=1))
 
-    while IFS= read -r line; do
-        ((line_num++))
+    # Identify the categories of the lines collected by match_file
+    local match line
+    shopt -s nocasematch
+    while IFS= read -r match; do
+        line_num="${match%%:*}"
+        line="${match#*:}"
 
-        # Check each security pattern
         for pattern_type in "${!SECURITY_PATTERNS[@]}"; do
             local pattern="${SECURITY_PATTERNS[$pattern_type]}"
             local risk_level="${RISK_LEVELS[$pattern_type]}"
 
-            if echo "$line" | grep -iE "$pattern" >/dev/null 2>&1; then
+            if [[ "$line" =~ $pattern ]]; then
                 log_result "$risk_level" "$file" "$line_num" "$pattern_type" "$line"
             fi
         done
-
-        # Check for overly long lines (potential data exfiltration)
-        if [[ ${#line} -gt 1000 ]]; then
+    done < "$matches"
+    shopt -u nocasematch
+
+    # Report the line checks collected by match_file
+    local check
+    while IFS= read -r line_num && IFS= read -r check; do
+        if [[ "$check" == "long_line" ]]; then
+            # Overly long lines (potential data exfiltration)
             log_result "MEDIUM" "$file" "$line_num" "long_line" "Line exceeds 1000 characters"
-        fi
-
-        # Check for binary content
-        if [[ "$line" =~ [^[:print:][:space:]] ]]; then
+        elif [[ "$check" == "binary_content" ]]; then
             log_result "HIGH" "$file" "$line_num" "binary_content" "Non-printable characters detected"
         fi
-
-    done < "$file"
+    done < "$matches.lines"
 }
 
 # Check file permissions
 check_permissions() {
     local file="$1"
-    local perms
-    perms=$(stat -c "%a" "$file" 2>/dev/null || echo "000")
+    local perms="$2"
 
     # Check for overly permissive permissions
     if [[ "$perms" -gt 644 ]] && [[ -f "$file" ]]; then
@@ -130,8 +265,7 @@ check_permissions() {
 # Check for suspicious file names
 check_filename() {
     local file="$1"
-    local basename
-    basename=$(basename "$file")
+    local basename="${file##*/}"
 
     # Check for suspicious file extensions
     if [[ "$basename" =~ \.(exe|bat|cmd|sh|ps1|scr|com|pif)$ ]]; then
@@ -144,12 +278,13 @@ check_filename() {
     fi
 
     # Check for suspicious names
-    local suspicious_names=("passwd" "shadow" "hosts" "config" "secrets" "private")
-    for name in "${suspicious_names[@]}"; do
-        if [[ "$basename" =~ $name ]]; then
-            log_result "MEDIUM" "$file" "0" "suspicious_name" "Potentially sensitive filename: $name"
-        fi
-    done
+    if [[ "$basename" =~ $SUSPICIOUS_NAME_UNION ]]; then
+        for name in "${SUSPICIOUS_NAMES[@]}"; do
+            if [[ "$basename" =~ $name ]]; then
+                log_result "MEDIUM" "$file" "0" "suspicious_name" "Potentially sensitive filename: $name"
+            fi
+        done
+    fi
 }
 
 # Generate JSON report
@@ -175,8 +310,8 @@ generate_report() {
     "low_issues": ${SCAN_RESULTS["low_issues"]}
   },
   "risk_assessment": {
-    "overall_risk": "$(calculate_risk_level)",
-    "security_posture": "$(calculate_security_posture)",
+    "overall_risk": "$OVERALL_RISK",
+    "security_posture": "$SECURITY_POSTURE",
     "recommendations": [
       "Review and remediate all CRITICAL and HIGH severity findings",
       "Implement regular security scanning in CI/CD pipeline",
@@ -232,8 +367,8 @@ print_summary() {
     echo -e "Medium: ${YELLOW}${SCAN_RESULTS["medium_issues"]}${NC}"
     echo -e "Low: ${YELLOW}${SCAN_RESULTS["low_issues"]}${NC}"
     echo
-    echo "Overall Risk: $(calculate_risk_level)"
-    echo "Security Posture: $(calculate_security_posture)"
+    echo "Overall Risk: $OVERALL_RISK"
+    echo "Security Posture: $SECURITY_POSTURE"
     echo
 }
 
@@ -253,16 +388,60 @@ main() {
         exit 1
     fi
 
-    # Scan all files recursively
-    while IFS= read -r -d '' file; do
-        check_filename "$file"
-        check_permissions "$file"
+    # Walk the tree once; find also reports each file's permissions. Each
+    # record is split at its first tab only, as read would strip a tab
+    # that ends the file name
+    local -a files=() modes=()
+    local record
+    while IFS= read -r -d '' record; do
+        modes+=("${record%%$'\t'*}")
+        files+=("${record#*$'\t'}")
+    done < <(find "$SCAN_DIR" -type f -printf '%m\t%p\0')
+
+    # Only trust a private cache directory, as anyone who can write to it
+    # could plant entries that hide findings
+    if [[ -n "$SCAN_CACHE_DIR" ]]; then
+        mkdir -p -m 700 "$SCAN_CACHE_DIR"
+
+        local cache_mode
+        cache_mode=$(stat -c "%a" "$SCAN_CACHE_DIR")
+        if [[ ! -O "$SCAN_CACHE_DIR" ]] || ((8#$cache_mode & 8#022)); then
+            echo -e "${RED}ERROR: Cache directory must be owned by you and not group or world writable: $SCAN_CACHE_DIR${NC}"
+            exit 1
+        fi
+    fi
 
-        # Only scan text files
-        if file "$file" | grep -q "text\|ASCII\|UTF-8\|empty"; then
-            scan_file "$file"
+    MATCH_DIR=$(mktemp -d)
+    trap 'rm -rf "$MATCH_DIR"' EXIT
+
+    # Collect pattern matches for all files concurrently, then report
+    # them in walk order
+    local i
+    for i in "${!files[@]}"; do
+        if ((i >= SCAN_JOBS)); then
+            wait -n || true
+        fi
+        match_file "${files[$i]}" "$MATCH_DIR/$i" &
+    done
+    wait
+
+    for i in "${!files[@]}"; do
+        check_filename "${files[$i]}"
+        check_permissions "${files[$i]}" "${modes[$i]}"
+
+        # A job that left no result at all failed as well
+        if [[ -f "$MATCH_DIR/$i.error" ]]; then
+            log_result "HIGH" "${files[$i]}" "0" "scan_error" "File could not be scanned"
+        elif [[ -f "$MATCH_DIR/$i.lines" ]]; then
+            scan_file "${files[$i]}" "$MATCH_DIR/$i"
+        elif [[ ! -f "$MATCH_DIR/$i.skip" ]]; then
+            log_result "HIGH" "${files[$i]}" "0" "scan_error" "File could not be scanned"
         fi
-    done < <(find "$SCAN_DIR" -type f -print0)
+    done
+
+    # Assess the results once for both the report and the summary
+    OVERALL_RISK=$(calculate_risk_level)
+    SECURITY_POSTURE=$(calculate_security_posture)
 
     # Generate report and summary
     generate_report
@@ -13,6 +13,29 @@ readonly PROJECT_DIR="$(dirname "$SCRIPT_DIR")"
 readonly MAX_INPUT_LENGTH=10240  # 10KB
 readonly ALLOWED_CHARS_PATTERN='^[a-zA-Z0-9[:space:]\-_.,!?()[\]{}'"'"'":;@#%&*+=/<>|~`^\\]*$'
 readonly BLOCKED_PATTERNS=('{{' '${' '<script' 'javascript:' 'eval(' 'function(' 'require(' 'import(' '../' '/./' '/etc/' '/home/' '/root/')
+readonly INJECTION_PATTERNS=('SELECT ' 'INSERT ' 'UPDATE ' 'DELETE ' 'DROP ' 'CREATE ' 'ALTER ' 'UNION ' 'OR 1=1' 'AND 1=1')
+
+# Union of the blocked patterns as one escaped regex, so clean input is
+# checked in a single pass
+literal_regex_union() {
+    local target="$1"
+    shift
+    local union="" literal char i
+
+    for literal in "$@"; do
+        union+="${union:+|}"
+        for ((i = 0; i < ${#literal}; i++)); do
+            char="${literal:i:1}"
+            if [[ "$char" == [][\\.^\$*+?\(\)\{\}\|] ]]; then
+                union+="\\"
+            fi
+            union+="$char"
+        done
+    done
+    printf -v "$target" '%s' "$union"
+}
+literal_regex_union BLOCKED_PATTERN_UNION "${BLOCKED_PATTERNS[@]}"
+readonly BLOCKED_PATTERN_UNION
 
 # Colors
 readonly RED='\033[0;31m'
@@ -25,6 +48,7 @@ validate_input() {
     local input="$1"
     local field_name="${2:-input}"
     local verbose="${3:-false}"
+    local fail_fast="${4:-false}"
     local errors=0
 
     echo "Validating input for field: $field_name"
@@ -33,31 +57,42 @@ validate_input() {
     if [[ ${#input} -gt $MAX_INPUT_LENGTH ]]; then
         echo -e "${RED}ERROR: Input exceeds maximum length of $MAX_INPUT_LENGTH characters${NC}"
         echo "  Current length: ${#input}"
-        ((errors++))
+        ((errors+=1))
     elif [[ "$verbose" == "true" ]]; then
         echo -e "${GREEN}✓ Length validation passed (${#input}/$MAX_INPUT_LENGTH)${NC}"
     fi
 
-    # Check for blocked patterns
-    for pattern in "${BLOCKED_PATTERNS[@]}"; do
-        if [[ "$input" == *"$pattern"* ]]; then
-            echo -e "${RED}ERROR: Input contains blocked pattern: $pattern${NC}"
-            echo "  This pattern is blocked for security reasons"
-            ((errors++))
-        fi
-    done
+    # Check for blocked patterns, naming each one only if the union hits
+    if [[ "$input" =~ $BLOCKED_PATTERN_UNION ]]; then
+        for pattern in "${BLOCKED_PATTERNS[@]}"; do
+            if [[ "$fail_fast" == "true" && $errors -gt 0 ]]; then
+                break
+            fi
+            if [[ "$input" == *"$pattern"* ]]; then
+                echo -e "${RED}ERROR: Input contains blocked pattern: $pattern${NC}"
+                echo "  This pattern is blocked for security reasons"
+                ((errors+=1))
+            fi
+        done
+    fi
 
     if [[ $errors -eq 0 && "$verbose" == "true" ]]; then
         echo -e "${GREEN}✓ Pattern validation passed${NC}"
     fi
 
+    # Stop before the remaining scans once an error is known
+    if [[ "$fail_fast" == "true" && $errors -gt 0 ]]; then
+        echo -e "${RED}✗ Input validation FAILED for $field_name ($errors errors)${NC}"
+        return 1
+    fi
+
     # Check for dangerous control characters
     if [[ "$input" =~ [[:cntrl:]] ]]; then
         # Allow common whitespace characters but block other control chars
         if [[ ! "$input" =~ ^[[:print:][:space:]]*$ ]]; then
             echo -e "${RED}ERROR: Input contains dangerous control characters${NC}"
             echo "  Allowed: printable characters and basic whitespace"
-            ((errors++))
+            ((errors+=1))
         fi
     fi
 
@@ -66,8 +101,7 @@ validate_input() {
     fi
 
     # Check for potential injection attempts
-    local injection_patterns=('SELECT ' 'INSERT ' 'UPDATE ' 'DELETE ' 'DROP ' 'CREATE ' 'ALTER ' 'UNION ' 'OR 1=1' 'AND 1=1')
-    for pattern in "${injection_patterns[@]}"; do
+    for pattern in "${INJECTION_PATTERNS[@]}"; do
         if [[ "$input" =~ $pattern ]]; then
             echo -e "${YELLOW}WARNING: Input contains SQL-like pattern: $pattern${NC}"
             echo "  This may be legitimate content, but please verify"
@@ -88,6 +122,7 @@ validate_input() {
 main() {
     local input_file=""
     local verbose=false
+    local fail_fast=false
     local field_name="input"
 
     # Parse arguments
@@ -97,14 +132,19 @@ main() {
                 verbose=true
                 shift
                 ;;
+            --fail-fast)
+                fail_fast=true
+                shift
+                ;;
             --field)
                 field_name="$2"
                 shift 2
                 ;;
             --help|-h)
-                echo "Usage: $0 [input_file] [--verbose] [--field field_name]"
+                echo "Usage: $0 [input_file] [--verbose] [--fail-fast] [--field field_name]"
                 echo "  input_file: File containing input to validate (optional, will read from stdin)"
                 echo "  --verbose: Show detailed validation results"
+                echo "  --fail-fast: Stop at the first validation error"
                 echo "  --field: Name of the field being validated"
                 exit 0
                 ;;
@@ -132,7 +172,7 @@ main() {
     fi
 
     # Validate input
-    validate_input "$input" "$field_name" "$verbose"
+    validate_input "$input" "$field_name" "$verbose" "$fail_fast"
 }
 
 # Execute main function